@@ -9,19 +9,18 @@ reference state that could be used for equilibrium chemical potentials.
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Type, Union
 
 import numpy as np
 import numpy.typing as npt
 import tinydb
-from pycalphad import Database, variables as v
+from pycalphad import Database, Model, variables as v
 from pycalphad.plot.eqplot import _map_coord_to_variable
-from pycalphad.core.utils import filter_phases, unpack_species
-from scipy.stats import norm
+from pycalphad.core.utils import filter_phases, instantiate_models, unpack_species
+from pycalphad.codegen.phase_record_factory import PhaseRecordFactory
 from pycalphad import Workspace
 from pycalphad.property_framework import JanssonDerivative
 
-from espei.core_utils import ravel_conditions
 from espei.error_functions.residual_base import ResidualFunction, residual_function_registry
 from espei.phase_models import PhaseModelSpecification
 from espei.typing import SymbolName
@@ -30,138 +29,377 @@ from espei.utils import database_symbols_to_fit, PickleableTinyDB
 _log = logging.getLogger(__name__)
 
 
-def target_chempots_from_activity(component, parameters, target_activity, temperatures, wks_ref):
+def reference_state_chempot(component, gradient_props, wks_ref):
     """
-    Return an array of experimental chemical potentials for the component
+    Return the chemical potential of the component in the reference state and its gradient
 
     Parameters
     ----------
     component : str
         Name of the component
-    target_activity : numpy.ndarray
-        Array of experimental activities
+    gradient_props : List[JanssonDerivative]
+        Derivatives of the chemical potential of the component with respect to each parameter
+    wks_ref : pycalphad.Workspace
+        Workspace of the equilibrium reference state. Should contain a singe point calculation.
+
+    Returns
+    -------
+    Tuple[float, np.ndarray]
+        Reference chemical potential and its gradient with respect to the parameters
+    """
+    if not gradient_props:
+        # no parameters to take derivatives with respect to
+        return wks_ref.get(v.MU(component)), np.empty(0)
+    ref_chempot, *gradients = wks_ref.get_dict(v.MU(component), *gradient_props).values()
+    ref_grads = np.fromiter(gradients, dtype=np.float64, count=len(gradients))
+    return ref_chempot, ref_grads
+
+
+def target_chempots_from_log_activity(log_activity, temperatures, ref_chempots):
+    """
+    Return an array of experimental chemical potentials from the logarithm of the activities
+
+    Parameters
+    ----------
+    log_activity : numpy.ndarray
+        Array of the natural logarithm of experimental activities
     temperatures : numpy.ndarray
-        Ravelled array of temperatures (of same size as ``exp_activity``).
-    reference_result : xarray.Dataset
-        Dataset of the equilibrium reference state. Should contain a singe point calculation.
+        Ravelled array of temperatures (of same size as ``log_activity``).
+    ref_chempots : numpy.ndarray
+        Reference state chemical potentials (of same size as ``log_activity``).
 
     Returns
     -------
     numpy.ndarray
         Array of experimental chemical potentials
     """
-    
-    ref_chempot = wks_ref.get(v.MU(component))
-    exp_chem_pots = v.R * temperatures * np.log(target_activity) + ref_chempot
-    
-    gradient_props = [JanssonDerivative(v.MU(component), key) for key in parameters]
-    gradients = wks_ref.get(*gradient_props)
-    if type(gradients) is list:
-        ref_grads = [float(element) for element in gradients]
+    return float(v.R) * temperatures * log_activity + ref_chempots
+
+
+def build_activity_log_values(activity_datasets) -> Dict[int, np.ndarray]:
+    """
+    Return the logarithm of the ravelled activities of each dataset, keyed by the dataset ``doc_id``
+
+    The activities do not depend on the parameters, so they only need to be
+    computed once for a set of datasets.
+    """
+    return {ds.doc_id: np.log(np.ravel(ds['values'])) for ds in activity_datasets}
+
+
+def _reference_state_key(ds) -> Tuple:
+    """Return a hashable key for the reference state calculation of an activity dataset."""
+    ref = ds['reference_state']
+    acr_component = ds['output'].split('_')[1]
+    return (tuple(sorted(ds['components'])), acr_component, tuple(sorted(ref['phases'])), tuple((coord, tuple(np.atleast_1d(val))) for coord, val in sorted(ref['conditions'].items())))
+
+
+def _get_activity_datasets(datasets, comps):
+    return datasets.search(
+        (tinydb.where('output').test(lambda x: 'ACR' in x)) &
+        (tinydb.where('components').test(lambda x: set(x).issubset(comps))))
+
+
+def _register_parameter_potentials(parameter_names: Sequence[SymbolName]) -> List[v.IndependentPotential]:
+    """
+    Return IndependentPotential variables for the parameters.
+
+    The parameters are treated as conditions so that the gradients can be
+    computed by Jansson derivatives. This mutates the global pycalphad
+    namespace.
+    """
+    params_keys = []
+    for key in parameter_names:
+        if not hasattr(v, key):
+            setattr(v, key, v.IndependentPotential(key))
+        params_keys.append(getattr(v, key))
+    return params_keys
+
+
+def build_activity_gradient_props(components: Sequence[str], params_keys: Sequence[v.IndependentPotential]) -> Dict[str, List[JanssonDerivative]]:
+    """
+    Return the derivatives of the chemical potential of each component with respect to each parameter.
+    """
+    return {comp: [JanssonDerivative(v.MU(comp), key) for key in params_keys] for comp in components}
+
+
+def build_activity_phase_records(dbf: Database, comps: Sequence[str], phases: Sequence[str],
+                                 datasets: PickleableTinyDB,
+                                 params_keys: Sequence[v.IndependentPotential],
+                                 phase_models: Optional[Dict[str, Type[Model]]] = None,
+                                 ) -> Dict[Tuple[str, ...], Tuple[Dict[str, Model], PhaseRecordFactory]]:
+    """
+    Build the Model and PhaseRecordFactory objects for each subsystem of the activity data.
+
+    Parameters
+    ----------
+    dbf : Database
+        Database to consider
+    comps : Sequence[str]
+        List of active component names
+    phases : Sequence[str]
+        List of phases to consider
+    datasets : PickleableTinyDB
+        Datasets that contain activity data
+    params_keys : Sequence[v.IndependentPotential]
+        Parameters that are set as conditions
+    phase_models : Optional[Dict[str, Type[Model]]]
+        Dictionary phase names to pycalphad Model classes.
+
+    Returns
+    -------
+    Dict[Tuple[str, ...], Tuple[Dict[str, Model], PhaseRecordFactory]]
+        Mapping of the sorted components of each subsystem to the models and
+        phase record factory for the phases of the data and the reference states.
+    """
+    subsystem_phases = {}
+    for ds in _get_activity_datasets(datasets, comps):
+        subsystem_phases.setdefault(tuple(sorted(ds['components'])), set()).update(phases, ds['reference_state']['phases'])
+
+    # parameters remain symbolic in the models so they can be set as conditions
+    symbolic_params = [str(key) for key in params_keys if str(key) in dbf.symbols]
+    phase_records = {}
+    for data_comps, candidate_phases in subsystem_phases.items():
+        species = sorted(unpack_species(dbf, data_comps), key=str)
+        data_phases = filter_phases(dbf, species, candidate_phases=candidate_phases)
+        models = instantiate_models(dbf, species, data_phases, model=phase_models, parameters=symbolic_params, symbols_only=False)
+        phase_record_factory = PhaseRecordFactory(dbf, species, {v.N, v.P, v.T, *params_keys}, models)
+        phase_records[data_comps] = (models, phase_record_factory)
+    return phase_records
+
+
+def build_activity_reference_chempots(dbf: Database, comps: Sequence[str], datasets: PickleableTinyDB,
+                                      phase_records: Dict[Tuple[str, ...], Tuple[Dict[str, Model], PhaseRecordFactory]],
+                                      params_keys: Sequence[v.IndependentPotential],
+                                      ) -> Dict[Tuple, Tuple[float, np.ndarray]]:
+    """
+    Compute the reference state chemical potentials that do not depend on the parameters.
+
+    If none of the models of the reference state phases contain the fitted
+    parameters, the reference chemical potential is constant and its gradient
+    is zero, so it only needs to be computed once.
+
+    Parameters
+    ----------
+    dbf : Database
+        Database to consider
+    comps : Sequence[str]
+        List of active component names
+    datasets : PickleableTinyDB
+        Datasets that contain activity data
+    phase_records : Dict[Tuple[str, ...], Tuple[Dict[str, Model], PhaseRecordFactory]]
+        Models and PhaseRecordFactory for each subsystem, see ``build_activity_phase_records``.
+    params_keys : Sequence[v.IndependentPotential]
+        Parameters that are set as conditions
+
+    Returns
+    -------
+    Dict[Tuple, Tuple[float, np.ndarray]]
+        Mapping of reference state keys to the reference chemical potential and
+        its (zero) gradient for the parameter independent reference states.
+    """
+    param_names = {str(key) for key in params_keys}
+    reference_chempots = {}
+    for ds in _get_activity_datasets(datasets, comps):
+        ref_key = _reference_state_key(ds)
+        if ref_key in reference_chempots:
+            continue
+        ref = ds['reference_state']
+        models, phase_record_factory = phase_records[tuple(sorted(ds['components']))]
+        if not all(phase in models for phase in ref['phases']):
+            continue
+        if any(param_names.intersection(str(sym) for sym in models[phase].ast.free_symbols) for phase in ref['phases']):
+            continue
+        ref_conditions = {_map_coord_to_variable(coord): val for coord, val in ref['conditions'].items()}
+        # the parameters must be set as conditions, but their values do not matter
+        ref_conditions.update(dict.fromkeys(params_keys, 0.0))
+        wks_ref = Workspace(database=dbf, components=ds['components'], phases=ref['phases'], models=models, phase_record_factory=phase_record_factory, conditions=ref_conditions)
+        acr_component = ds['output'].split('_')[1]
+        reference_chempots[ref_key] = (wks_ref.get(v.MU(acr_component)), np.zeros(len(params_keys)))
+    return reference_chempots
+
+
+def calculate_dataset_chempots(ds, dbf, data_phases, parameters, models, phase_record_factory, gradient_props) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the chemical potentials of the component of an activity dataset and their gradients
+
+    The calculations for each dataset are independent of the other datasets.
+
+    Parameters
+    ----------
+    ds : tinydb.database.Document
+        Activity dataset
+    dbf : pycalphad.Database
+        Database to consider
+    data_phases : list
+        List of phases to consider in the subsystem of the dataset
+    parameters : dict
+        Dictionary of parameters that are set as conditions
+    models : dict
+        Models of the subsystem of the dataset
+    phase_record_factory : PhaseRecordFactory
+        PhaseRecordFactory of the subsystem of the dataset
+    gradient_props : List[JanssonDerivative]
+        Derivatives of the chemical potential of the component with respect to each parameter
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Chemical potentials at each point in the (P, T, X) order of the values
+        and their gradients with respect to the parameters
+    """
+    acr_component = ds['output'].split('_')[1]  # the component of interest
+    # get the conditions
+    # P and T are special cased, the remaining conditions are compositions
+    # which are paired point-by-point rather than broadcast against each other
+    pot_conds = {v.P: ds['conditions']['P'], v.T: ds['conditions']['T']}
+    comp_conds = {_map_coord_to_variable(cond): np.atleast_1d(value) for cond, value in ds['conditions'].items() if cond not in ('P', 'T')}
+    # pycalphad broadcasts all conditions against each other, which matches
+    # the shape of the values if there is only one composition condition.
+    # Otherwise each paired composition must be computed independently.
+    if len(comp_conds) == 1:
+        rav_comp_conds = [comp_conds]
     else:
-        ref_grads = gradients
-    return exp_chem_pots, ref_grads
+        rav_comp_conds = [dict(zip(comp_conds.keys(), pt_comps)) for pt_comps in zip(*comp_conds.values())]
+    # do the calculations in a single Workspace, only updating the composition
+    # conditions for each subsequent paired composition. Equilibrium is not
+    # computed until properties are requested.
+    wks_sample = Workspace(database=dbf, components=ds['components'], phases=data_phases, models=models, phase_record_factory=phase_record_factory, conditions={**pot_conds, **rav_comp_conds[0], **parameters})
+    computed_chempots = []
+    computed_gradients = []
+    for pt_idx, pt_comp_conds in enumerate(rav_comp_conds):
+        if pt_idx > 0:
+            wks_sample.conditions = {**pot_conds, **pt_comp_conds, **parameters}
+        if gradient_props:
+            chempots, *grads = wks_sample.get_dict(v.MU(acr_component), *gradient_props).values()
+        else:
+            chempots, grads = wks_sample.get(v.MU(acr_component)), []
+        chempots = np.asarray(chempots).reshape(-1)
+        computed_chempots.append(chempots)
+        computed_gradients.append(np.asarray(grads, dtype=np.float64).reshape(len(gradient_props), chempots.size))
+    # the potentials are broadcast within each composition calculation,
+    # stacking on the last axis restores the (P, T, X) order of the values
+    dataset_computed_chempots = np.stack(computed_chempots, axis=-1).ravel().astype(np.float64)
+    dataset_gradients = np.stack(computed_gradients, axis=-1).reshape(len(gradient_props), dataset_computed_chempots.size).T.astype(np.float64)
+    return dataset_computed_chempots, dataset_gradients
 
 
 # TODO: roll this function into ActivityResidual
-def calculate_activity_residuals(dbf, comps, phases, datasets, parameters=None, phase_models=None, callables=None, data_weight=1.0) -> Tuple[List[float], List[float], List[float]]:
+def calculate_activity_residuals(dbf, comps, phases, datasets, parameters=None, phase_models=None, callables=None, data_weight=1.0, phase_records=None, gradient_props=None, log_activities=None, reference_chempots=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
+    Return the residuals, weights and gradients of the residuals for activity data
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Residuals and weights of shape (N,) and gradients of the residuals with
+        respect to the parameters of shape (N, len(parameters))
+
     Notes
     -----
     General procedure:
     1. Get the datasets
     2. For each dataset
 
-        a. Calculate reference state equilibrium
+        a. Calculate reference state equilibrium, shared by datasets with the same reference state
         b. Calculate current chemical potentials
-        c. Find the target chemical potentials
-        d. Calculate error due to chemical potentials
+
+    3. Find the target chemical potentials for all datasets at once
+    4. Calculate error due to chemical potentials for each dataset
     """
     std_dev = 500  # J/mol
 
     if parameters is None:
         parameters = {}
 
-    params_keys = []
-
-    # This mutates the global pycalphad namespace
-    for key in parameters.keys():
-        if not hasattr(v, key):
-            setattr(v, key, v.IndependentPotential(key))
-        params_keys.append(getattr(v, key))
-        # Mutates argument to function
-        dbf.symbols.pop(key,None)
-        
-    activity_datasets = datasets.search(
-        (tinydb.where('output').test(lambda x: 'ACR' in x)) &
-        (tinydb.where('components').test(lambda x: set(x).issubset(comps))))
-
-    residuals = []
-    weights = []
-    gradients = []
+    activity_datasets = _get_activity_datasets(datasets, comps)
+    if phase_records is None or gradient_props is None:
+        params_keys = _register_parameter_potentials([str(key) for key in parameters.keys()])
+    if phase_records is None:
+        phase_records = build_activity_phase_records(dbf, comps, phases, datasets, params_keys, phase_models)
+    if log_activities is None:
+        log_activities = build_activity_log_values(activity_datasets)
+    if gradient_props is None and len(parameters) == 0:
+        gradient_props = {ds['output'].split('_')[1]: [] for ds in activity_datasets}
+    elif gradient_props is None:
+        gradient_props = build_activity_gradient_props({ds['output'].split('_')[1] for ds in activity_datasets}, params_keys)
+
+    # pre-allocate the results for all datasets
+    total_points = sum(np.size(ds['values']) for ds in activity_datasets)
+    residuals = np.empty(total_points)
+    weights = np.empty(total_points)
+    gradients = np.empty((total_points, len(parameters)))
+    # target chemical potentials are computed for all datasets at once
+    target_log_activities = np.empty(total_points)
+    target_temperatures = np.empty(total_points)
+    target_ref_chempots = np.empty(total_points)
+
+    ref_results = dict(reference_chempots) if reference_chempots is not None else {}
+    subsystem_phases = {}  # many datasets share the same subsystem
+    offset = 0
     for ds in activity_datasets:
         acr_component = ds['output'].split('_')[1]  # the component of interest
+        dataset_slice = slice(offset, offset + np.size(ds['values']))
         # calculate the reference state equilibrium
         ref = ds['reference_state']
         # data_comps and data_phases ensures that we only do calculations on
         # the subsystem of the system defining the data.
         data_comps = ds['components']
-        data_phases = filter_phases(dbf, unpack_species(dbf, data_comps), candidate_phases=phases)
-        ref_conditions = {_map_coord_to_variable(coord): val for coord, val in ref['conditions'].items()}
-        # removed parameter assignment from wks_ref
-        ref_conditions.update(parameters)
-        wks_ref = Workspace(database=dbf, components=data_comps, phases=ref['phases'], conditions=ref_conditions)
-
-        # calculate current chemical potentials
-        # get the conditions
-        conditions = {}
-        # first make sure the conditions are paired
-        # only get the compositions, P and T are special cased
-        conds_list = [(cond, value) for cond, value in ds['conditions'].items() if cond not in ('P', 'T')]
-        # ravel the conditions
-        # we will ravel each composition individually, since they all must have the same shape
-        dataset_computed_chempots = []
-        dataset_weights = []
-        dataset_gradients = []
-        for comp_name, comp_x in conds_list:
-            P, T, X = ravel_conditions(ds['values'], ds['conditions']['P'], ds['conditions']['T'], comp_x)
-            conditions[v.P] = P
-            conditions[v.T] = T
-            conditions[_map_coord_to_variable(comp_name)] = X
-        # do the calculations
-        # we cannot currently turn broadcasting off, so we have to do equilibrium one by one
-        # invert the conditions dicts to make a list of condition dicts rather than a condition dict of lists
-        # assume now that the ravelled conditions all have the same size
-        conditions_list = [{c: conditions[c][i] for c in conditions.keys()} for i in range(len(conditions[v.T]))]
-        for conds in conditions_list:
-            conds.update(parameters)
-            wks_sample = Workspace(database=dbf, components=data_comps, phases=data_phases, conditions=conds)
-            dataset_computed_chempots.append(wks_sample.get(v.MU(acr_component)))
-            dataset_weights.append(std_dev / data_weight / ds.get("weight", 1.0))
-            gradient_props = [JanssonDerivative(v.MU(acr_component), key) for key in parameters]
-            grads = wks_sample.get(*gradient_props)
-            if type(grads) is list:
-                sample_grads = [float(element) for element in grads]
-            else:
-                sample_grads = grads
-            dataset_gradients.append(sample_grads)
-
-        # calculate target chempots
-        dataset_activities = np.array(ds['values']).flatten()
-        dataset_target_chempots, ref_grads = target_chempots_from_activity(acr_component, parameters, dataset_activities, conditions[v.T], wks_ref)
-        dataset_residuals = (np.asarray(dataset_computed_chempots) - np.asarray(dataset_target_chempots, dtype=float)).tolist()
-        adjusted_gradient = []
-        for element in dataset_gradients:
-            adjusted_gradient.append((np.asarray(element) - np.asarray(ref_grads)).tolist())
-        _log.debug('Data: %s, chemical potential difference: %s, reference: %s', dataset_activities, dataset_residuals, ds["reference"])
-        residuals.extend(dataset_residuals)
-        weights.extend(dataset_weights)
-        gradients.append(adjusted_gradient)
+        subsystem_key = tuple(sorted(data_comps))
+        if subsystem_key not in subsystem_phases:
+            subsystem_phases[subsystem_key] = filter_phases(dbf, unpack_species(dbf, data_comps), candidate_phases=phases)
+        data_phases = subsystem_phases[subsystem_key]
+        models, phase_record_factory = phase_records[subsystem_key]
+        dataset_gradient_props = gradient_props[acr_component]
+        ref_key = _reference_state_key(ds)
+        if ref_key not in ref_results:
+            ref_conditions = {_map_coord_to_variable(coord): val for coord, val in ref['conditions'].items()}
+            # removed parameter assignment from wks_ref
+            ref_conditions.update(parameters)
+            wks_ref = Workspace(database=dbf, components=data_comps, phases=ref['phases'], models=models, phase_record_factory=phase_record_factory, conditions=ref_conditions)
+            ref_results[ref_key] = reference_state_chempot(acr_component, dataset_gradient_props, wks_ref)
+        ref_chempot, ref_grads = ref_results[ref_key]
+
+        # calculate current chemical potentials, the residuals hold the
+        # computed chemical potentials until the targets are subtracted
+        residuals[dataset_slice], gradients[dataset_slice] = calculate_dataset_chempots(ds, dbf, data_phases, parameters, models, phase_record_factory, dataset_gradient_props)
+        # the reference gradients are broadcast over all points of the dataset
+        gradients[dataset_slice] -= ref_grads
+        weights[dataset_slice] = std_dev / data_weight / ds.get("weight", 1.0)
+
+        # broadcast the temperatures to the (P, T, X) shape of the values
+        target_temperatures[dataset_slice] = np.broadcast_to(np.reshape(ds['conditions']['T'], (1, -1, 1)), np.shape(ds['values'])).ravel()
+        target_log_activities[dataset_slice] = log_activities[ds.doc_id]
+        target_ref_chempots[dataset_slice] = ref_chempot
+        offset = dataset_slice.stop
+
+    # calculate target chempots for all datasets at once
+    residuals -= target_chempots_from_log_activity(target_log_activities, target_temperatures, target_ref_chempots)
+
+    if _log.isEnabledFor(logging.DEBUG):
+        offset = 0
+        for ds in activity_datasets:
+            dataset_slice = slice(offset, offset + np.size(ds['values']))
+            _log.debug('Data: %s, chemical potential difference: %s, reference: %s', ds['values'], residuals[dataset_slice], ds["reference"])
+            offset = dataset_slice.stop
     return residuals, weights, gradients
 
 
+def _normal_loglikelihood(residuals: npt.NDArray, weights: npt.NDArray, gradients: npt.NDArray) -> Tuple[float, npt.NDArray]:
+    """
+    Return the log-likelihood of normally distributed residuals and its gradient.
+
+    Equivalent to ``np.sum(norm(0, scale=weights).logpdf(residuals))`` and
+    ``-np.sum(residuals*gradients.T/weights**2, axis=1)``, but the scaled
+    residuals are shared and the sums are computed as dot products.
+    """
+    scaled_residuals = residuals/weights
+    likelihood = -0.5*residuals.size*np.log(2*np.pi) - np.sum(np.log(weights)) - 0.5*np.dot(scaled_residuals, scaled_residuals)
+    likelihood_grads = -np.dot(scaled_residuals/weights, gradients)
+    return float(likelihood), likelihood_grads
+
+
 # TODO: roll this function into ActivityResidual
-def calculate_activity_error(dbf, comps, phases, datasets, parameters=None, phase_models=None, callables=None, data_weight=1.0) -> Tuple[float, List[float]]:
+def calculate_activity_error(dbf, comps, phases, datasets, parameters=None, phase_models=None, callables=None, data_weight=1.0, phase_records=None, gradient_props=None, log_activities=None, reference_chempots=None) -> Tuple[float, np.ndarray]:
     """
     Return the sum of square error from activity data
 
@@ -176,7 +414,8 @@ def calculate_activity_error(dbf, comps, phases, datasets, parameters=None, phas
     datasets : espei.utils.PickleableTinyDB
         Datasets that contain single phase data
     parameters : dict
-        Dictionary of symbols that will be overridden in pycalphad.equilibrium
+        Dictionary of symbols (or their IndependentPotential variables) that
+        will be set as conditions in pycalphad.Workspace
     phase_models : dict
         Phase models to pass to pycalphad calculations
     callables : dict
@@ -185,42 +424,39 @@ def calculate_activity_error(dbf, comps, phases, datasets, parameters=None, phas
         Weight for standard deviation of activity measurements, dimensionless.
         Corresponds to the standard deviation of differences in chemical
         potential in typical measurements of activity, in J/mol.
+    phase_records : dict
+        Models and PhaseRecordFactory for each subsystem, see
+        ``build_activity_phase_records``. Built if not provided.
+    gradient_props : dict
+        Derivatives of the chemical potential of each component with respect
+        to each parameter, see ``build_activity_gradient_props``. Built if not provided.
+    log_activities : dict
+        Logarithm of the activities of each dataset, see
+        ``build_activity_log_values``. Built if not provided.
+    reference_chempots : dict
+        Reference state chemical potentials and gradients that do not depend
+        on the parameters, see ``build_activity_reference_chempots``. Any other
+        reference states are computed.
 
     Returns
     -------
-    float
-        A single float of the likelihood
+    Tuple[float, np.ndarray]
+        The likelihood and its gradient with respect to the parameters
 
 
     """
-    residuals, weights, gradients = calculate_activity_residuals(dbf, comps, phases, datasets, parameters=parameters, phase_models=phase_models, callables=callables, data_weight=data_weight)
-    likelihood = np.sum(norm(0, scale=weights).logpdf(residuals))
-    if len(gradients) == 0:
-        likelihood_grads = []
-    else: 
-        gradients = np.concatenate(gradients)
-        derivative = -np.array(residuals)*np.array(gradients).T/np.array(weights)**2
-        if derivative.ndim == 1:
-            likelihood_grads = np.sum(derivative, axis=0)
-        else:
-            likelihood_grads = np.sum(derivative, axis=1)
-    if np.isnan(likelihood):
+    residuals, weights, gradients = calculate_activity_residuals(dbf, comps, phases, datasets, parameters=parameters, phase_models=phase_models, callables=callables, data_weight=data_weight, phase_records=phase_records, gradient_props=gradient_props, log_activities=log_activities, reference_chempots=reference_chempots)
+    if not np.all(np.isfinite(residuals)):
         # TODO: revisit this case and evaluate whether it is resonable for NaN
         # to show up here. When this comment was written, the test
         # test_subsystem_activity_probability would trigger a NaN.
+        # Non-finite residuals give a non-finite likelihood, so the
+        # reductions are skipped.
         return -np.inf, np.zeros(len(parameters))
+    likelihood, likelihood_grads = _normal_loglikelihood(residuals, weights, gradients)
     return likelihood, likelihood_grads
 
 
-# TODO: the __init__ method should pre-compute Model and PhaseRecord objects
-#       similar to the other residual functions, which will be much more performant.
-# TODO: it seems possible (likely?) that "global" callables that were used
-#       previously could be incorrect if there are activity datasets with
-#       different sets of active components. Usually models, callables, and
-#       phase records are tied 1:1 with a set of components. For now, callables
-#       will never be built, but this will almost certainly cause a performance
-#       regression. Model will also not be pre-built so we can properly use
-#       custom user models
 class ActivityResidual(ResidualFunction):
     def __init__(
         self,
@@ -247,21 +483,50 @@ class ActivityResidual(ResidualFunction):
         if symbols_to_fit is None:
             symbols_to_fit = database_symbols_to_fit(database)
         self._symbols_to_fit = symbols_to_fit
+        # The parameters are set as conditions, so the IndependentPotential
+        # variables are only created (in the global pycalphad namespace) once.
+        self._params_keys = _register_parameter_potentials(symbols_to_fit)
+        # Models and phase records are tied 1:1 with a set of components, so
+        # they are built for each subsystem of the activity datasets.
+        phase_records = build_activity_phase_records(database, comps, phases, datasets, self._params_keys, model_dict)
+        activity_datasets = _get_activity_datasets(datasets, comps)
+        self._acr_components = sorted({ds['output'].split('_')[1] for ds in activity_datasets})
+        gradient_props = build_activity_gradient_props(self._acr_components, self._params_keys)
+        # The activities are fixed data, so their logarithms are computed once
+        log_activities = build_activity_log_values(activity_datasets)
+        # Reference states that don't depend on the parameters are also computed once
+        reference_chempots = build_activity_reference_chempots(database, comps, datasets, phase_records, self._params_keys)
 
         self._activity_likelihood_kwargs = {
             "dbf": database, "comps": comps, "phases": phases, "datasets": datasets,
             "phase_models": model_dict,
             "callables": None,
             "data_weight": self.weight,
+            "phase_records": phase_records,
+            "gradient_props": gradient_props,
+            "log_activities": log_activities,
+            "reference_chempots": reference_chempots,
         }
 
+    def __getstate__(self):
+        # pycalphad ChemicalPotential objects are not restored correctly by
+        # pickle, so the gradient properties are rebuilt after unpickling
+        state = self.__dict__.copy()
+        state["_activity_likelihood_kwargs"] = {**self._activity_likelihood_kwargs, "gradient_props": None}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._params_keys = _register_parameter_potentials(self._symbols_to_fit)
+        self._activity_likelihood_kwargs["gradient_props"] = build_activity_gradient_props(self._acr_components, self._params_keys)
+
     def get_residuals(self, parameters: npt.ArrayLike) -> Tuple[List[float], List[float]]:
-        parameters = {param_name: param for param_name, param in zip(self._symbols_to_fit, parameters.tolist())}
+        parameters = dict(zip(self._params_keys, parameters.tolist()))
         residuals, weights, grads = calculate_activity_residuals(parameters=parameters, **self._activity_likelihood_kwargs)
-        return residuals, weights
+        return residuals.tolist(), weights.tolist()
 
     def get_likelihood(self, parameters: npt.NDArray) -> Tuple[float, List[float]]:
-        parameters = {param_name: param for param_name, param in zip(self._symbols_to_fit, parameters.tolist())}
+        parameters = dict(zip(self._params_keys, parameters.tolist()))
         likelihood, gradients = calculate_activity_error(parameters=parameters, **self._activity_likelihood_kwargs)
         return likelihood, gradients
 
@@ -12,11 +12,11 @@ import pickle
 import scipy.stats
 from tinydb import where
 
-from pycalphad import Database
+from pycalphad import Database, variables as v
 
 from espei.paramselect import generate_parameters
 from espei.error_functions import *
-from espei.error_functions.activity_error import ActivityResidual
+from espei.error_functions.activity_error import build_activity_phase_records, build_activity_reference_chempots, calculate_activity_residuals, target_chempots_from_log_activity, ActivityResidual
 from espei.error_functions.equilibrium_thermochemical_error import calc_prop_differences, EquilibriumPropertyResidual
 from espei.error_functions.non_equilibrium_thermochemical_error import FixedConfigurationPropertyResidual
 from espei.error_functions.zpf_error import calculate_zpf_driving_forces, ZPFResidual
@@ -72,6 +72,25 @@ def test_subsystem_activity_probability(datasets_db):
     assert np.isclose(prob, bin_prob)
 
 
+def test_target_chempots_from_log_activity_are_vectorized():
+    """Target chemical potentials are computed point-wise for concatenated datasets."""
+    activities = np.array([1.0, np.exp(-1.0), 1.0])
+    temperatures = np.array([1000.0, 1000.0, 500.0])
+    ref_chempots = np.array([-1.0e4, -1.0e4, -2.0e4])
+    target_chempots = target_chempots_from_log_activity(np.log(activities), temperatures, ref_chempots)
+    assert np.allclose(target_chempots, [-1.0e4, -1.0e4 - 8.3145*1000.0, -2.0e4], rtol=1e-4)
+
+
+def test_activity_residuals_paired_compositions(datasets_db):
+    """Multiple composition conditions are paired point-by-point and ordered the same as the values."""
+    datasets_db.insert(CR_FE_NI_ACTIVITY)
+
+    dbf = Database(CR_FE_NI_TDB)
+    residuals, weights, _ = calculate_activity_residuals(dbf, ['CR', 'FE', 'NI', 'VA'], ['BCC_A2', 'FCC_A1', 'LIQUID'], datasets_db)
+    assert np.allclose(residuals, [-382.64445190812694, -1272.6957083182424, -1356.5964088272522, -7509.660046735793, -8462.077890216322, -8737.34134532768])
+    assert np.allclose(weights, 250.0)
+
+
 def test_get_thermochemical_data_filters_invalid_sublattice_configurations(datasets_db):
     datasets_db.insert(CU_MG_HM_MIX_CUMG2_ANTISITE)
 
@@ -575,6 +594,49 @@ def test_activity_context_is_pickleable(datasets_db):
     assert np.isclose(regular_predict, unpickle_predict)
 
 
+def test_activity_residual_gradients_are_pickleable(datasets_db):
+    """ActivityResidual computes the same likelihood and gradients after pickling"""
+    datasets_db.insert(CU_MG_EXP_ACTIVITY)
+    dbf = Database(CU_MG_TDB)
+
+    symbols_to_fit = database_symbols_to_fit(dbf)
+    initial_guess = np.array([unpack_piecewise(dbf.symbols[s]) for s in symbols_to_fit])
+    residual_func = ActivityResidual(dbf, datasets_db, phase_models=None, symbols_to_fit=symbols_to_fit)
+    residual_func_unpickled = pickle.loads(pickle.dumps(residual_func))
+
+    likelihood, gradients = residual_func.get_likelihood(initial_guess)
+    unpickle_likelihood, unpickle_gradients = residual_func_unpickled.get_likelihood(initial_guess)
+    assert np.isclose(likelihood, unpickle_likelihood)
+    assert len(gradients) == len(symbols_to_fit)
+    assert np.allclose(gradients, unpickle_gradients)
+
+
+def test_activity_residual_parameter_independent_reference_state(datasets_db):
+    """Reference states that don't depend on the fitted parameters are precomputed with zero gradients"""
+    datasets_db.insert(CU_MG_EXP_ACTIVITY)
+    dbf = Database(CU_MG_TDB)
+    comps = ['CU', 'MG', 'VA']
+    phases = list(dbf.phases.keys())
+
+    # VV0000 is only in CUMG2, the reference state is LIQUID
+    symbols_to_fit = ['VV0000']
+    initial_guess = np.array([unpack_piecewise(dbf.symbols[s]) for s in symbols_to_fit])
+    # constructing the residual function registers the parameters as pycalphad variables
+    residual_func = ActivityResidual(dbf, datasets_db, phase_models=None, symbols_to_fit=symbols_to_fit)
+
+    params_keys = [v.VV0000]
+    phase_records = build_activity_phase_records(dbf, comps, phases, datasets_db, params_keys)
+    reference_chempots = build_activity_reference_chempots(dbf, comps, datasets_db, phase_records, params_keys)
+    assert len(reference_chempots) == 1
+    assert all(np.all(ref_grads == 0) for _, ref_grads in reference_chempots.values())
+
+    likelihood, gradients = residual_func.get_likelihood(initial_guess)
+    parameters = dict(zip(symbols_to_fit, initial_guess.tolist()))
+    computed_likelihood, computed_gradients = calculate_activity_error(dbf, comps, phases, datasets_db, parameters=parameters)
+    assert np.isclose(likelihood, computed_likelihood)
+    assert np.allclose(gradients, computed_gradients)
+
+
 def test_non_equilibrium_thermochemical_context_is_pickleable(datasets_db):
     """Test that the context for non-equilibrium thermochemical data is pickleable"""
     datasets_db.insert(CU_MG_CPM_MIX_X_HCP_A3)
@@ -973,6 +973,21 @@ CR_NI_ACTIVITY = {
 }
 
 
+CR_FE_NI_ACTIVITY = {
+    "components": ["CR", "FE", "NI", "VA"],
+    "phases": ["FCC_A1"],
+    "reference_state": {
+        "phases": ["FCC_A1"],
+        "conditions": {"P": 101325, "T": 1200, "X_NI": 0.9999, "X_CR": 0.00005}
+    },
+    "conditions": {"P": 101325, "T": [1200, 1300], "X_NI": [0.9, 0.8, 0.7], "X_CR": [0.05, 0.1, 0.1]},
+    "output": "ACR_NI",
+    "values": [[[0.9, 0.8, 0.65], [0.88, 0.79, 0.66]]],
+    "weight": 2.0,
+    "reference": "activity test", "comment": "Paired composition conditions"
+}
+
+
 CR_NI_LIQUID_EQ_TC_DATA = {
     "components": ["CR", "NI"],
     "phases": ["FCC_A1"],